@@ -0,0 +1,37 @@
+"""
+Run the Lambda handler locally.
+
+Loads environment variables from a .env file (when python-dotenv is installed), invokes
+the handler once and prints the response. Kept outside src/ so the deployed
+function never imports dotenv.
+
+Usage:
+    python scripts/local_run.py
+"""
+import json
+import logging
+import os
+import sys
+
+# Add repository root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def main() -> int:
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # python-dotenv is only needed for local runs; fall back to the shell environment
+        pass
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+
+    from src.lambda_handler import handler
+
+    result = handler({}, None)
+    print(json.dumps(result, indent=2, default=str))
+    return 0 if result.get('statusCode') == 200 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
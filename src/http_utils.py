@@ -0,0 +1,20 @@
+import orjson
+import requests
+from typing import Any
+
+
+def parse_json_response(response: requests.Response) -> Any:
+    """
+    Raise for HTTP error statuses and decode a JSON response body.
+
+    Args:
+        response: Response returned by the API
+
+    Returns:
+        Decoded JSON body
+
+    Raises:
+        requests.HTTPError: If the response has a 4xx or 5xx status
+    """
+    response.raise_for_status()
+    return orjson.loads(response.content)
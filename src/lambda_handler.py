@@ -1,48 +1,284 @@
 import os
+import time
 import logging
 import json
-from typing import Dict, Any, Optional
-import boto3
-from botocore.exceptions import ClientError
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+import orjson
+import requests
+from botocore.exceptions import BotoCoreError, ClientError
 from .questrade import QuestradeClient
 from .lunchmoney import LunchMoneyClient
 
-# Configure logging
-logger = logging.getLogger()
+# Configure logging on the module logger; the Lambda runtime owns the root logger
+logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-ssm_client = boto3.client('ssm')
+# AWS clients are created on first use so cold starts that read through the
+# Parameters and Secrets Lambda Extension never build a botocore client
+_ssm_client = None
 
+# Environment settings are fixed for the container's lifetime, so read them once
 PARAMETER_NAME = os.environ.get('QUESTRADE_PARAMETER_NAME', '/questrade-lunchmoney/account-configs')
+LUNCHMONEY_API_TOKEN = os.environ.get('LUNCHMONEY_API_TOKEN')
+ACCOUNT_CONFIGS_JSON = os.environ.get('QUESTRADE_ACCOUNT_CONFIGS')
+
+# Read parameters through the AWS Parameters and Secrets Lambda Extension when the layer is attached
+USE_PARAMETERS_EXTENSION = os.environ.get('USE_PARAMETERS_EXTENSION', 'false').lower() == 'true'
+PARAMETERS_EXTENSION_PORT = os.environ.get('PARAMETERS_SECRETS_EXTENSION_HTTP_PORT', '2773')
+
+# Concurrency and rate-limit retry settings
+MAX_WORKERS = int(os.environ.get('SYNC_MAX_CONCURRENCY', '8'))
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
+
+# Shared HTTP session: keep-alive connections to Questrade and Lunch Money are
+# reused across accounts, worker threads and warm invocations
+_http_session = requests.Session()
+_http_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS + 1))
+
+# Lunch Money client reused across warm invocations
+_lunchmoney_client: Optional[LunchMoneyClient] = None
+
+# Parameter values cached across warm invocations: name -> (fetched_at, value, version)
+CONFIG_CACHE_TTL = int(os.environ.get('CONFIG_CACHE_TTL', '300'))
+_parameter_cache: Dict[str, Tuple[float, str, Optional[int]]] = {}
+
+# Parsed account configs and the parameter version they were parsed from
+_cached_configs: Optional[list] = None
+_cached_configs_version: Optional[int] = None
+
+
+class SyncResult(NamedTuple):
+    """Outcome of syncing one Questrade account."""
+    balance: float
+    updated: bool
+    token_rotated: bool
+
+
+def _get_ssm_client():
+    """Get the module-level SSM client, creating it on first use."""
+    global _ssm_client
+    if _ssm_client is None:
+        # Create the client straight from botocore; boto3 only adds a session wrapper
+        # and resource models this function never uses
+        import botocore.session
+        from botocore.config import Config
+        _ssm_client = botocore.session.get_session().create_client('ssm', config=Config(
+            retries={'mode': 'standard', 'max_attempts': 3},
+            connect_timeout=1,
+            read_timeout=3,
+            # Keep the pooled connection alive between warm invocations to skip a new TLS handshake
+            tcp_keepalive=True
+        ))
+    return _ssm_client
+
+
+def _get_lunchmoney_client() -> LunchMoneyClient:
+    """Get the module-level Lunch Money client, creating it on first use."""
+    global _lunchmoney_client
+    if _lunchmoney_client is None:
+        _lunchmoney_client = LunchMoneyClient(LUNCHMONEY_API_TOKEN, session=_http_session)
+    return _lunchmoney_client
+
+
+def _get_parameter_from_extension(name: str) -> Dict:
+    """Get an SSM parameter from the Parameters and Secrets Lambda Extension's local cache."""
+    url = (
+        f"http://localhost:{PARAMETERS_EXTENSION_PORT}/systemsmanager/parameters/get"
+        f"?name={urllib.parse.quote(name, safe='')}&withDecryption=true"
+    )
+    request = urllib.request.Request(url, headers={
+        'X-Aws-Parameters-Secrets-Token': os.environ.get('AWS_SESSION_TOKEN', '')
+    })
+    with urllib.request.urlopen(request, timeout=2) as response:
+        return orjson.loads(response.read())['Parameter']
+
+
+def _get_parameter(name: str) -> Tuple[str, Optional[int]]:
+    """Get an SSM parameter's value and version, reusing a cached copy while it is within the TTL."""
+    entry = _parameter_cache.get(name)
+    if entry and time.monotonic() - entry[0] < CONFIG_CACHE_TTL:
+        return entry[1], entry[2]
+
+    if USE_PARAMETERS_EXTENSION:
+        parameter = _get_parameter_from_extension(name)
+    else:
+        parameter = _get_ssm_client().get_parameter(Name=name, WithDecryption=True)['Parameter']
+    value, version = parameter['Value'], parameter.get('Version')
+    _parameter_cache[name] = (time.monotonic(), value, version)
+    return value, version
+
+
+def _load_env_account_configs() -> Optional[list]:
+    """Parse account configurations supplied directly via QUESTRADE_ACCOUNT_CONFIGS, if any."""
+    if not ACCOUNT_CONFIGS_JSON:
+        return None
+    try:
+        config_data = orjson.loads(ACCOUNT_CONFIGS_JSON)
+    except orjson.JSONDecodeError as e:
+        logger.warning("Ignoring invalid JSON in QUESTRADE_ACCOUNT_CONFIGS, using SSM Parameter Store: %s", e)
+        return None
+    if not isinstance(config_data, dict):
+        logger.warning("Ignoring QUESTRADE_ACCOUNT_CONFIGS: expected a JSON object, using SSM Parameter Store")
+        return None
+    return config_data.get('accounts', [])
+
+
+# Configs supplied through the environment skip SSM Parameter Store entirely
+_env_account_configs = _load_env_account_configs()
 
 
 def get_account_configs() -> list:
-    """Retrieve account configurations from SSM Parameter Store."""
+    """Retrieve account configurations from QUESTRADE_ACCOUNT_CONFIGS or SSM Parameter Store."""
+    global _cached_configs, _cached_configs_version
+    if _env_account_configs is not None:
+        logger.info("Loaded configurations for %d Questrade account(s) from QUESTRADE_ACCOUNT_CONFIGS",
+                    len(_env_account_configs))
+        return _env_account_configs
+
     try:
-        response = ssm_client.get_parameter(Name=PARAMETER_NAME, WithDecryption=True)
-        config_data = json.loads(response['Parameter']['Value'])
-        accounts = config_data.get('accounts', [])
-        logger.info(f"Loaded configurations for {len(accounts)} Questrade account(s) from SSM Parameter Store")
+        value, version = _get_parameter(PARAMETER_NAME)
+        if version is not None and version == _cached_configs_version:
+            # Same parameter version as last time: reuse the parsed configs
+            accounts = _cached_configs
+        else:
+            config_data = orjson.loads(value)
+            accounts = config_data.get('accounts', [])
+            _cached_configs, _cached_configs_version = accounts, version
+        logger.info("Loaded configurations for %d Questrade account(s) from SSM Parameter Store", len(accounts))
         return accounts
-    except ClientError as e:
+    except (ClientError, BotoCoreError, urllib.error.URLError) as e:
         raise ValueError(f"Failed to retrieve SSM parameter {PARAMETER_NAME}: {e}")
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in SSM parameter {PARAMETER_NAME}: {e}")
 
 
 def save_account_configs(accounts: list) -> None:
     """Save updated account configurations back to SSM Parameter Store."""
+    global _cached_configs, _cached_configs_version
+    if _env_account_configs is not None:
+        logger.warning("Account configurations come from QUESTRADE_ACCOUNT_CONFIGS. "
+                       "Manual update required. Updated configuration:")
+        logger.warning(json.dumps({'accounts': accounts}, indent=2))
+        return
+
+    value = orjson.dumps({'accounts': accounts}).decode()
+
     try:
-        value = json.dumps({'accounts': accounts})
-        ssm_client.put_parameter(Name=PARAMETER_NAME, Value=value, Type='SecureString', Overwrite=True)
+        response = _get_ssm_client().put_parameter(
+            Name=PARAMETER_NAME, Value=value, Type='SecureString', Overwrite=True
+        )
+        version = response.get('Version')
+        # Seed the cache with the written value: the extension may keep serving the
+        # previous version (with its consumed refresh tokens) until its own TTL expires.
+        _parameter_cache[PARAMETER_NAME] = (time.monotonic(), value, version)
+        _cached_configs, _cached_configs_version = accounts, version
         logger.info("Successfully updated account configurations in SSM Parameter Store")
-    except ClientError as e:
-        logger.error(f"Failed to update SSM parameter {PARAMETER_NAME}: {e}")
+    except (ClientError, BotoCoreError) as e:
+        # Timeouts are BotoCoreErrors; the rotated tokens must still be logged for manual recovery
+        logger.error("Failed to update SSM parameter %s: %s", PARAMETER_NAME, e)
         logger.warning("Manual update required. Updated configuration:")
         logger.warning(json.dumps({'accounts': accounts}, indent=2))
 
 
+def _with_backoff(func, *args, **kwargs):
+    """Call an API function, retrying with exponential backoff when rate limited (HTTP 429)."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return func(*args, **kwargs)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status != 429 or attempt == MAX_RETRIES - 1:
+                raise
+            delay = RETRY_BACKOFF_SECONDS * (2 ** attempt)
+            logger.warning("Rate limited by API, retrying in %.1fs", delay)
+            time.sleep(delay)
+
+
+def _is_valid_config(account_config: dict) -> bool:
+    """Check that an account config has every field needed to sync it."""
+    return bool(
+        account_config.get('questrade_account_id')
+        and account_config.get('questrade_refresh_token')
+        and account_config.get('lunchmoney_asset_name')
+    )
+
+
+def _sync_one(
+    account_config: dict,
+    lunchmoney_client: LunchMoneyClient,
+    assets_future: Future
+) -> tuple:
+    """
+    Sync the balance of a single Questrade account to its Lunch Money asset.
+
+    Args:
+        account_config: Validated account configuration from SSM Parameter Store
+        lunchmoney_client: Shared Lunch Money API client
+        assets_future: Future that completes once lunchmoney_client's asset index is refreshed
+
+    Returns:
+        Tuple of (account_id, SyncResult, updated_config)
+    """
+    questrade_account_id = account_config['questrade_account_id']
+    refresh_token = account_config['questrade_refresh_token']
+    lunchmoney_asset_name = account_config['lunchmoney_asset_name']
+
+    logger.debug("Processing Questrade account %s → Lunch Money asset '%s'", questrade_account_id, lunchmoney_asset_name)
+
+    questrade_client = QuestradeClient(refresh_token, session=_http_session)
+    balance, success = 0, False
+
+    try:
+        logger.debug("Fetching balance for Questrade account %s", questrade_account_id)
+        # Retry individual calls rather than the whole account: the client keeps the
+        # rotated refresh token, whereas a fresh client would reuse the consumed one.
+        balances = _with_backoff(questrade_client.get_account_balances, questrade_account_id)
+        total_equity = balances.get('totalEquity', 0)
+
+        logger.debug("Questrade account %s balance: $%.2f CAD", questrade_account_id, total_equity)
+
+        # The asset list is fetched concurrently with the Questrade calls above
+        assets_future.result()
+        asset = lunchmoney_client.get_asset_by_name(lunchmoney_asset_name)
+        if asset:
+            asset_id = asset.get('id')
+            logger.debug("Found Lunch Money asset ID: %s", asset_id)
+
+            _with_backoff(
+                lunchmoney_client.update_asset_balance,
+                asset_id=asset_id,
+                balance=total_equity,
+                currency='cad'
+            )
+
+            logger.debug("Successfully updated balance for %s", lunchmoney_asset_name)
+            balance, success = total_equity, True
+        else:
+            logger.error("Lunch Money asset '%s' not found. Skipping account %s.", lunchmoney_asset_name, questrade_account_id)
+    except Exception as sync_error:
+        logger.error("Balance update failed for account %s: %s", questrade_account_id, sync_error)
+
+    # Capture updated refresh token (Questrade rotates it on each auth)
+    new_token = questrade_client.get_current_refresh_token()
+    token_rotated = new_token != refresh_token
+    if token_rotated:
+        logger.debug("Token rotated for account %s", questrade_account_id)
+        updated_config = {
+            'questrade_account_id': questrade_account_id,
+            'questrade_refresh_token': new_token,
+            'lunchmoney_asset_name': lunchmoney_asset_name
+        }
+    else:
+        updated_config = account_config
+
+    return questrade_account_id, SyncResult(balance, success, token_rotated), updated_config
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     AWS Lambda handler function for syncing Questrade to Lunch Money.
@@ -52,6 +288,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                                   (default: /questrade-lunchmoney/account-configs)
         LUNCHMONEY_API_TOKEN: Lunch Money API access token
 
+    Optional Environment Variables:
+        SYNC_MAX_CONCURRENCY: Maximum number of accounts synced in parallel (default: 8)
+        CONFIG_CACHE_TTL: Seconds to cache the SSM parameter across warm invocations (default: 300)
+        USE_PARAMETERS_EXTENSION: Read the parameter via the Parameters and Secrets Lambda Extension
+        PREFETCH_ACCOUNT_CONFIGS: Load the account configs at module import (Lambda init);
+                                  ignored when USE_PARAMETERS_EXTENSION is enabled
+        QUESTRADE_ACCOUNT_CONFIGS: Account configs as JSON (same format as below); when set,
+                                   SSM Parameter Store is not read or written
+
     SSM parameter format (JSON, stored as SecureString):
         {
           "accounts": [
@@ -64,105 +309,74 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     """
     try:
-        lunchmoney_api_token = os.environ.get('LUNCHMONEY_API_TOKEN')
-        if not lunchmoney_api_token:
+        if not LUNCHMONEY_API_TOKEN:
             raise ValueError("LUNCHMONEY_API_TOKEN environment variable is required")
 
         account_configs = get_account_configs()
         if not account_configs:
             raise ValueError("No Questrade account configurations found in SSM Parameter Store")
 
-        logger.info(f"Starting balance sync for {len(account_configs)} Questrade account(s)")
-
-        lunchmoney_client = LunchMoneyClient(lunchmoney_api_token)
-
-        all_results = {}
-        updated_configs = []
-        total_new = 0
-
+        # Validate up front so the worker pool only receives accounts it can sync
+        valid_configs = []
         for account_config in account_configs:
-            questrade_account_id = account_config.get('questrade_account_id')
-            refresh_token = account_config.get('questrade_refresh_token')
-            lunchmoney_asset_name = account_config.get('lunchmoney_asset_name')
-
-            if not questrade_account_id or not refresh_token or not lunchmoney_asset_name:
-                logger.error(f"Invalid account config: {account_config}")
-                continue
-
-            logger.info(f"Processing Questrade account {questrade_account_id} → Lunch Money asset '{lunchmoney_asset_name}'")
-
-            asset = lunchmoney_client.get_asset_by_name(lunchmoney_asset_name)
-            if not asset:
-                logger.error(f"Lunch Money asset '{lunchmoney_asset_name}' not found. Skipping account {questrade_account_id}.")
-                all_results[questrade_account_id] = (0, False)
-                updated_configs.append(account_config)
-                continue
-
-            asset_id = asset.get('id')
-            logger.info(f"Found Lunch Money asset ID: {asset_id}")
+            if _is_valid_config(account_config):
+                valid_configs.append(account_config)
+            else:
+                logger.error("Invalid account config: %s", account_config)
 
-            questrade_client = QuestradeClient(refresh_token)
+        logger.info("Starting balance sync for %d Questrade account(s)", len(valid_configs))
 
-            try:
-                logger.info(f"Fetching balance for Questrade account {questrade_account_id}")
-                balances = questrade_client.get_account_balances(questrade_account_id)
-                total_equity = balances.get('totalEquity', 0)
+        lunchmoney_client = _get_lunchmoney_client()
 
-                logger.info(f"Questrade account {questrade_account_id} balance: ${total_equity:,.2f} CAD")
+        results_body: Dict[str, Dict] = {}
+        updated_configs = []
+        total_new = 0
+        tokens_changed = 0
 
-                lunchmoney_client.update_asset_balance(
-                    asset_id=asset_id,
-                    balance=total_equity,
-                    currency='cad'
-                )
+        # Accounts are independent and I/O-bound, so sync them concurrently. The asset
+        # list is fetched once, on its own worker, while the Questrade calls are in flight.
+        outcomes = [None] * len(valid_configs)
+        if valid_configs:
+            max_workers = min(MAX_WORKERS, len(valid_configs)) + 1
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                assets_future = executor.submit(_with_backoff, lunchmoney_client.refresh_assets)
+                futures = {
+                    executor.submit(_sync_one, account_config, lunchmoney_client, assets_future): index
+                    for index, account_config in enumerate(valid_configs)
+                }
+                for future in as_completed(futures):
+                    outcomes[futures[future]] = future.result()
 
-                logger.info(f"Successfully updated balance for {lunchmoney_asset_name}")
-                all_results[questrade_account_id] = (total_equity, True)
+        # Merge in config order so the saved parameter keeps its account ordering;
+        # totals, the per-account log and the response body share this single pass
+        log_accounts = logger.isEnabledFor(logging.INFO)
+        for outcome in outcomes:
+            questrade_account_id, result, updated_config = outcome
+            if log_accounts:
+                status = "Updated" if result.updated else "Failed"
+                logger.info("  Account %s: %s - Balance: $%s",
+                            questrade_account_id, status, format(result.balance, ',.2f'))
+            results_body[questrade_account_id] = {'balance': result.balance, 'updated': result.updated}
+            updated_configs.append(updated_config)
+            if result.updated:
                 total_new += 1
-            except Exception as sync_error:
-                logger.error(f"Balance update failed for account {questrade_account_id}: {sync_error}")
-                all_results[questrade_account_id] = (0, False)
-
-            # Capture updated refresh token (Questrade rotates it on each auth)
-            new_token = questrade_client.get_current_refresh_token()
-            if new_token != refresh_token:
-                logger.info(f"Token rotated for account {questrade_account_id}")
-                updated_configs.append({
-                    'questrade_account_id': questrade_account_id,
-                    'questrade_refresh_token': new_token,
-                    'lunchmoney_asset_name': lunchmoney_asset_name
-                })
-            else:
-                updated_configs.append(account_config)
-
-        logger.info(f"Balance sync completed: {total_new} account(s) updated successfully")
-        for account_id, (balance, success) in all_results.items():
-            status = "Updated" if success else "Failed"
-            logger.info(f"  Account {account_id}: {status} - Balance: ${balance:,.2f}")
-
-        tokens_changed = sum(
-            1 for cfg in updated_configs
-            if cfg.get('questrade_refresh_token') != next(
-                (orig['questrade_refresh_token'] for orig in account_configs
-                 if orig['questrade_account_id'] == cfg['questrade_account_id']), None
-            )
-        )
+            if result.token_rotated:
+                tokens_changed += 1
+
+        logger.info("Balance sync completed: %d account(s) updated successfully", total_new)
 
         if tokens_changed > 0:
-            logger.info(f"{tokens_changed} Questrade token(s) rotated, saving to SSM")
+            logger.info("%d Questrade token(s) rotated, saving to SSM", tokens_changed)
             save_account_configs(updated_configs)
 
         return {
             'statusCode': 200,
             'body': {
                 'message': 'Balance sync completed successfully',
-                'results': {
-                    account_id: {'balance': balance, 'updated': success}
-                    for account_id, (balance, success) in all_results.items()
-                },
+                'results': results_body,
                 'totals': {
                     'accounts_updated': total_new,
-                    'accounts_failed': len(all_results) - total_new
+                    'accounts_failed': len(results_body) - total_new
                 },
                 'accounts_processed': len(account_configs),
                 'tokens_rotated': tokens_changed,
@@ -170,7 +384,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        logger.error(f"Error during sync: {str(e)}", exc_info=True)
+        logger.error("Error during sync: %s", e, exc_info=True)
         return {
             'statusCode': 500,
             'body': {
@@ -178,3 +392,19 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'error': str(e)
             }
         }
+
+
+# Fetch the account configs during Lambda init, which runs before the first
+# invocation is timed, so warm and cold invocations both start from the cache.
+# Skipped when the Lunch Money token is missing: the handler fails fast on that
+# before touching SSM, so the fetch would be wasted. Also skipped when reading
+# through the Parameters and Secrets extension, which does not serve requests
+# until init has finished.
+PREFETCH_ACCOUNT_CONFIGS = os.environ.get('PREFETCH_ACCOUNT_CONFIGS', 'false').lower() == 'true'
+if PREFETCH_ACCOUNT_CONFIGS and USE_PARAMETERS_EXTENSION:
+    logger.warning("PREFETCH_ACCOUNT_CONFIGS is ignored when USE_PARAMETERS_EXTENSION is enabled")
+elif PREFETCH_ACCOUNT_CONFIGS and LUNCHMONEY_API_TOKEN:
+    try:
+        get_account_configs()
+    except Exception as e:
+        logger.warning("Account config prefetch failed, will retry in handler: %s", e)
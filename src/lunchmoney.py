@@ -1,6 +1,9 @@
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from datetime import datetime
+from .http_utils import parse_json_response
 
 
 class LunchMoneyClient:
@@ -8,13 +11,21 @@ class LunchMoneyClient:
 
     BASE_URL = "https://dev.lunchmoney.app/v1"
 
-    def __init__(self, api_token: str):
-        """Initialize the Lunch Money client with an API token."""
+    def __init__(self, api_token: str, session: Optional[requests.Session] = None):
+        """
+        Initialize the Lunch Money client with an API token.
+
+        Args:
+            api_token: Lunch Money API access token
+            session: Optional shared HTTP session to reuse pooled keep-alive connections
+        """
         self.api_token = api_token
+        self.session = session or requests.Session()
         self.headers = {
             'Authorization': f'Bearer {api_token}',
             'Content-Type': 'application/json'
         }
+        self._assets_by_name: Optional[Dict[str, Dict]] = None
 
     def _make_request(
         self,
@@ -26,22 +37,25 @@ class LunchMoneyClient:
         """Make an authenticated request to the Lunch Money API."""
         url = f"{self.BASE_URL}{endpoint}"
 
-        response = requests.request(
+        # Encode bodies with orjson; self.headers already carries the JSON Content-Type
+        body = orjson.dumps(data) if data is not None else None
+
+        response = self.session.request(
             method=method,
             url=url,
             headers=self.headers,
-            json=data,
+            data=body,
             params=params
         )
-        response.raise_for_status()
-
-        return response.json()
+        return parse_json_response(response)
 
     def get_transactions(
         self,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        asset_id: Optional[int] = None
+        asset_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None
     ) -> List[Dict]:
         """
         Get transactions from Lunch Money.
@@ -50,6 +64,8 @@ class LunchMoneyClient:
             start_date: Start date for transactions
             end_date: End date for transactions
             asset_id: Filter by specific asset ID
+            limit: Maximum number of transactions to return (one page)
+            offset: Number of transactions to skip, for fetching later pages
 
         Returns:
             List of transaction dictionaries
@@ -61,6 +77,10 @@ class LunchMoneyClient:
             params['end_date'] = end_date.strftime('%Y-%m-%d')
         if asset_id:
             params['asset_id'] = asset_id
+        if limit:
+            params['limit'] = limit
+        if offset:
+            params['offset'] = offset
 
         data = self._make_request('GET', '/transactions', params=params)
         return data.get('transactions', [])
@@ -101,6 +121,47 @@ class LunchMoneyClient:
         }
         return self._make_request('POST', '/transactions', data=payload)
 
+    def create_transactions_batched(
+        self,
+        transactions: List[Dict],
+        batch_size: int = 100,
+        max_workers: int = 4
+    ) -> Dict:
+        """
+        Create transactions in Lunch Money in fixed-size batches sent concurrently.
+
+        Args:
+            transactions: List of transaction dictionaries
+            batch_size: Maximum number of transactions per request
+            max_workers: Maximum number of batches in flight at once
+
+        Returns:
+            Dictionary with the created transaction IDs of all batches, in input order,
+            plus an 'error' list collecting any errors Lunch Money reported per batch
+        """
+        batches = [
+            transactions[i:i + batch_size]
+            for i in range(0, len(transactions), batch_size)
+        ]
+        if len(batches) <= 1:
+            responses = [self.create_transactions(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(batches), max_workers)) as executor:
+                responses = list(executor.map(self.create_transactions, batches))
+
+        ids = []
+        errors = []
+        for response in responses:
+            ids.extend(response.get('ids', []))
+            error = response.get('error')
+            if error:
+                errors.extend(error if isinstance(error, list) else [error])
+
+        result = {'ids': ids}
+        if errors:
+            result['error'] = errors
+        return result
+
     def get_assets(self) -> List[Dict]:
         """
         Get all assets (investment accounts, etc.).
@@ -113,7 +174,10 @@ class LunchMoneyClient:
 
     def get_asset_by_name(self, name: str) -> Optional[Dict]:
         """
-        Find an asset by name.
+        Find an asset by name (case-insensitive).
+
+        The asset list is fetched once per client and indexed by lowercased name;
+        call refresh_assets() to pick up assets created or renamed since.
 
         Args:
             name: Asset name to search for
@@ -121,11 +185,15 @@ class LunchMoneyClient:
         Returns:
             Asset dictionary if found, None otherwise
         """
-        assets = self.get_assets()
-        for asset in assets:
-            if asset.get('name', '').lower() == name.lower():
-                return asset
-        return None
+        if self._assets_by_name is None:
+            self.refresh_assets()
+        return self._assets_by_name.get(name.lower())
+
+    def refresh_assets(self) -> None:
+        """Re-fetch the asset list used by get_asset_by_name."""
+        self._assets_by_name = {
+            asset.get('name', '').lower(): asset for asset in self.get_assets()
+        }
 
     def update_asset_balance(self, asset_id: int, balance: float, currency: str = 'cad') -> Dict:
         """
@@ -1,18 +1,55 @@
 import os
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from .http_utils import parse_json_response
+
+# Access tokens cached across warm Lambda invocations, keyed by the refresh token
+# issued alongside them: refresh_token -> (access_token, api_server, expires_at).
+# expires_at is wall-clock (time.time()): the monotonic clock may not advance while
+# the Lambda sandbox is frozen between invocations.
+_token_cache: Dict[str, Tuple[str, str, float]] = {}
+
+# Cached access tokens this close to expiry are refreshed instead of reused
+TOKEN_CACHE_MARGIN = 60
 
 
 class QuestradeClient:
     """Client for interacting with the Questrade API."""
 
-    def __init__(self, refresh_token: str):
-        """Initialize the Questrade client with a refresh token."""
+    # Maximum number of date-window requests issued in parallel
+    MAX_CONCURRENT_REQUESTS = 4
+
+    def __init__(self, refresh_token: str, session: Optional[requests.Session] = None):
+        """
+        Initialize the Questrade client with a refresh token.
+
+        Args:
+            refresh_token: Questrade OAuth refresh token
+            session: Optional shared HTTP session to reuse pooled keep-alive connections
+        """
         self.refresh_token = refresh_token
+        self.session = session or requests.Session()
         self.access_token: Optional[str] = None
         self.api_server: Optional[str] = None
-        self.token_expiry: Optional[datetime] = None
+        # time.monotonic() deadline: cheap to compare on every request and immune to clock changes
+        self.token_expiry: Optional[float] = None
+        # Serializes refreshes when the client is shared across threads: Questrade
+        # rotates the refresh token, so a second concurrent refresh would fail
+        self._token_lock = threading.Lock()
+        # Whether the current access token was reused from _token_cache rather than issued to us
+        self._token_from_cache = False
+
+        cached = _token_cache.get(refresh_token)
+        if cached:
+            remaining = cached[2] - time.time()
+            if remaining > TOKEN_CACHE_MARGIN:
+                self.access_token, self.api_server = cached[0], cached[1]
+                self.token_expiry = time.monotonic() + remaining
+                self._token_from_cache = True
 
     def _refresh_access_token(self) -> None:
         """Refresh the access token using the refresh token."""
@@ -22,39 +59,68 @@ class QuestradeClient:
             'refresh_token': self.refresh_token
         }
 
-        response = requests.post(url, params=params)
-        response.raise_for_status()
-
-        data = response.json()
+        response = self.session.post(url, params=params)
+        data = parse_json_response(response)
+        old_refresh_token = self.refresh_token
         self.access_token = data['access_token']
-        self.api_server = data['api_server']
+        # Normalize once here rather than on every request
+        self.api_server = data['api_server'].rstrip('/')
         self.refresh_token = data['refresh_token']  # Update refresh token
+        self._token_from_cache = False
 
         # Set token expiry (usually 30 minutes)
         expires_in = data.get('expires_in', 1800)
-        self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
+        self.token_expiry = time.monotonic() + expires_in
+
+        # The old refresh token is spent; a client built from the new one can skip the OAuth exchange
+        _token_cache.pop(old_refresh_token, None)
+        _token_cache[self.refresh_token] = (self.access_token, self.api_server, time.time() + expires_in)
 
     def _ensure_valid_token(self) -> None:
         """Ensure we have a valid access token."""
-        if not self.access_token or not self.token_expiry or datetime.now() >= self.token_expiry:
-            self._refresh_access_token()
+        with self._token_lock:
+            if not self.access_token or not self.token_expiry or time.monotonic() >= self.token_expiry:
+                self._refresh_access_token()
 
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
         """Make an authenticated request to the Questrade API."""
         self._ensure_valid_token()
 
-        # Remove trailing slash from api_server and leading slash from endpoint to avoid double slashes
-        api_server = self.api_server.rstrip('/')
+        # api_server has no trailing slash; drop the endpoint's leading slash to avoid double slashes
         endpoint = endpoint.lstrip('/')
-        url = f"{api_server}/{endpoint}"
+        url = f"{self.api_server}/{endpoint}"
         headers = {
             'Authorization': f'Bearer {self.access_token}'
         }
 
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
+        response = self.session.get(url, headers=headers, params=params)
+        if response.status_code == 401 and self._discard_cached_token(headers['Authorization']):
+            # The cached access token was revoked or outlived its deadline; retry once with a fresh one
+            self._ensure_valid_token()
+            headers = {'Authorization': f'Bearer {self.access_token}'}
+            response = self.session.get(url, headers=headers, params=params)
+        return parse_json_response(response)
+
+    def _discard_cached_token(self, authorization: str) -> bool:
+        """
+        Drop a rejected access token that was reused from the warm-invocation cache.
+
+        Args:
+            authorization: Authorization header the rejected request was sent with
 
-        return response.json()
+        Returns:
+            True if a retry is worthwhile: the token came from the cache, or another
+            thread has already replaced it
+        """
+        with self._token_lock:
+            if authorization != f'Bearer {self.access_token}':
+                return True
+            if not self._token_from_cache:
+                return False
+            _token_cache.pop(self.refresh_token, None)
+            self.access_token = None
+            self._token_from_cache = False
+            return True
 
     def get_accounts(self) -> List[Dict]:
         """Get all accounts."""
@@ -94,23 +160,33 @@ class QuestradeClient:
         if end_date is None:
             end_date = datetime.now()
 
-        # Questrade API has a 31-day limit per request
-        activities = []
-        current_start = start_date
-
-        while current_start < end_date:
-            current_end = min(current_start + timedelta(days=31), end_date)
-
-            params = {
-                'startTime': current_start.replace(microsecond=0, tzinfo=timezone.utc).isoformat(),
-                'endTime': current_end.replace(microsecond=0, tzinfo=timezone.utc).isoformat()
-            }
+        # Questrade API has a 31-day limit per request. Each window ends where the next
+        # begins, so attach the timezone once and format every boundary a single time
+        end = end_date.replace(microsecond=0, tzinfo=timezone.utc)
+        boundaries = [start_date.replace(microsecond=0, tzinfo=timezone.utc)]
+        while boundaries[-1] < end:
+            boundaries.append(min(boundaries[-1] + timedelta(days=31), end))
+
+        timestamps = [boundary.isoformat() for boundary in boundaries]
+        windows = [
+            {'startTime': window_start, 'endTime': window_end}
+            for window_start, window_end in zip(timestamps, timestamps[1:])
+        ]
+
+        endpoint = f'/v1/accounts/{account_id}/activities'
+
+        if len(windows) <= 1:
+            pages = [self._make_request(endpoint, params) for params in windows]
+        else:
+            # Refresh once up front so the concurrent window requests share one access token
+            self._ensure_valid_token()
+            with ThreadPoolExecutor(max_workers=min(len(windows), self.MAX_CONCURRENT_REQUESTS)) as executor:
+                pages = list(executor.map(lambda params: self._make_request(endpoint, params), windows))
 
-            data = self._make_request(f'/v1/accounts/{account_id}/activities', params)
+        activities = []
+        for data in pages:
             activities.extend(data.get('activities', []))
 
-            current_start = current_end
-
         return activities
 
     def get_current_refresh_token(self) -> str:
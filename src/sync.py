@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Set, Tuple
 from .questrade import QuestradeClient
@@ -6,10 +7,16 @@ from .lunchmoney import LunchMoneyClient
 
 logger = logging.getLogger(__name__)
 
+# Duplicate-detection key: (date, amount, payee). Tuples hash without building a string per key
+TransactionKey = Tuple[str, float, str]
+
 
 class TransactionSync:
     """Handles syncing transactions from Questrade to Lunch Money."""
 
+    # Number of existing Lunch Money transactions fetched per request during dedup
+    TRANSACTION_PAGE_SIZE = 500
+
     def __init__(
         self,
         questrade_client: QuestradeClient,
@@ -46,25 +53,20 @@ class TransactionSync:
         activity_type = activity.get('type', '')
         symbol = activity.get('symbol', '')
 
-        # Build notes with relevant information
-        notes_parts = [
+        # Build notes with relevant information; optional fields are only included when set
+        price = activity.get('price')
+        commission = activity.get('commission')
+        optional_notes = (
+            ("Symbol", symbol),
+            ("Quantity", activity.get('quantity')),
+            ("Price", price and f"${price}"),
+            ("Commission", commission and f"${commission}")
+        )
+        notes = " | ".join((
             f"Type: {activity_type}",
-            f"Account: {account_id}"
-        ]
-
-        if symbol:
-            notes_parts.append(f"Symbol: {symbol}")
-
-        if activity.get('quantity'):
-            notes_parts.append(f"Quantity: {activity['quantity']}")
-
-        if activity.get('price'):
-            notes_parts.append(f"Price: ${activity['price']}")
-
-        if activity.get('commission'):
-            notes_parts.append(f"Commission: ${activity['commission']}")
-
-        notes = " | ".join(notes_parts)
+            f"Account: {account_id}",
+            *(f"{label}: {value}" for label, value in optional_notes if value)
+        ))
 
         # Build transaction
         transaction = {
@@ -82,7 +84,7 @@ class TransactionSync:
 
         return transaction
 
-    def _generate_transaction_key(self, transaction: Dict) -> str:
+    def _generate_transaction_key(self, transaction: Dict) -> TransactionKey:
         """
         Generate a unique key for a transaction for duplicate detection.
 
@@ -90,18 +92,38 @@ class TransactionSync:
             transaction: Transaction dictionary
 
         Returns:
-            Unique key string
+            Tuple of (date, amount, payee)
+        """
+        return (
+            transaction.get('date', ''),
+            float(transaction.get('amount', 0)),
+            transaction.get('payee', '')
+        )
+
+    def _activity_key(self, activity: Dict) -> TransactionKey:
         """
-        date = transaction.get('date', '')
-        amount = transaction.get('amount', 0)
-        payee = transaction.get('payee', '')
-        return f"{date}|{amount}|{payee}"
+        Generate the duplicate-detection key for a Questrade activity without mapping it.
+
+        Picks the same date, amount and payee that _map_activity_to_transaction would,
+        so the result equals _generate_transaction_key of the mapped transaction.
+
+        Args:
+            activity: Questrade activity dictionary
+
+        Returns:
+            Tuple of (date, amount, payee)
+        """
+        return (
+            activity.get('tradeDate') or activity.get('transactionDate'),
+            float(activity.get('netAmount', 0)),
+            activity.get('description', '') or f"Questrade - {activity.get('type', '')}"
+        )
 
     def _get_existing_transaction_keys(
         self,
         start_date: datetime,
         end_date: datetime
-    ) -> Set[str]:
+    ) -> Set[TransactionKey]:
         """
         Get keys for existing transactions in Lunch Money.
 
@@ -112,23 +134,25 @@ class TransactionSync:
         Returns:
             Set of transaction keys
         """
-        existing = self.lunchmoney.get_transactions(
-            start_date=start_date,
-            end_date=end_date,
-            asset_id=self.asset_id
-        )
-
         keys = set()
-        for txn in existing:
-            # Convert Lunch Money transaction to same format for key generation
-            key = self._generate_transaction_key({
-                'date': txn.get('date'),
-                'amount': float(txn.get('amount', 0)),
-                'payee': txn.get('payee', '')
-            })
-            keys.add(key)
-
-        return keys
+        offset = 0
+        # Page through the history so only one page of transaction dicts is held at a time
+        while True:
+            page = self.lunchmoney.get_transactions(
+                start_date=start_date,
+                end_date=end_date,
+                asset_id=self.asset_id,
+                limit=self.TRANSACTION_PAGE_SIZE,
+                offset=offset
+            )
+            # Same shape as _generate_transaction_key, built inline to skip a dict per transaction
+            keys.update(
+                (txn.get('date'), float(txn.get('amount', 0)), txn.get('payee', ''))
+                for txn in page
+            )
+            if len(page) < self.TRANSACTION_PAGE_SIZE:
+                return keys
+            offset += len(page)
 
     def sync_account(
         self,
@@ -143,81 +167,97 @@ class TransactionSync:
             days_back: Number of days to look back (max 31)
 
         Returns:
-            Tuple of (new_transactions_count, skipped_duplicates_count)
+            Tuple of (created_transactions_count, skipped_duplicates_count)
         """
-        logger.info(f"Starting sync for account {account_id}")
+        logger.info("Starting sync for account %s", account_id)
 
         # Calculate date range (limit to 31 days per Questrade API)
         end_date = datetime.now()
         days_back = min(days_back, 31)
         start_date = end_date - timedelta(days=days_back)
 
-        # Fetch activities from Questrade
-        logger.info(f"Fetching activities from {start_date.date()} to {end_date.date()}")
-        activities = self.questrade.get_account_activities(
-            account_id=account_id,
-            start_date=start_date,
-            end_date=end_date
-        )
-
-        if not activities:
-            logger.info("No activities found")
-            return 0, 0
-
-        logger.info(f"Found {len(activities)} activities")
-
-        # Get existing transactions to avoid duplicates
-        existing_keys = self._get_existing_transaction_keys(start_date, end_date)
-        logger.info(f"Found {len(existing_keys)} existing transactions in Lunch Money")
+        # The two services are independent, so look up existing Lunch Money transactions
+        # (to avoid duplicates) in the background while Questrade is queried
+        executor = ThreadPoolExecutor(max_workers=1)
+        existing_future = executor.submit(self._get_existing_transaction_keys, start_date, end_date)
+        try:
+            # Fetch activities from Questrade
+            logger.info("Fetching activities from %s to %s", start_date.date(), end_date.date())
+            activities = self.questrade.get_account_activities(
+                account_id=account_id,
+                start_date=start_date,
+                end_date=end_date
+            )
+
+            if not activities:
+                logger.info("No activities found")
+                return 0, 0
+
+            logger.info("Found %d activities", len(activities))
+
+            existing_keys = existing_future.result()
+            logger.info("Found %d existing transactions in Lunch Money", len(existing_keys))
+        finally:
+            # Without activities (or after a Questrade error) the lookup is not needed:
+            # cancel it if it has not started and never block on it
+            executor.shutdown(wait=False, cancel_futures=True)
 
         # Map and filter activities
         new_transactions = []
         skipped = 0
 
         for activity in activities:
-            transaction = self._map_activity_to_transaction(activity, account_id)
-            key = self._generate_transaction_key(transaction)
+            # Check the key first so duplicates, usually most of an incremental sync, are never mapped
+            key = self._activity_key(activity)
 
             if key in existing_keys:
                 skipped += 1
-                logger.debug(f"Skipping duplicate: {transaction['payee']} on {transaction['date']}")
+                logger.debug("Skipping duplicate: %s", key)
                 continue
 
-            new_transactions.append(transaction)
+            new_transactions.append(self._map_activity_to_transaction(activity, account_id))
 
         # Create transactions in Lunch Money
+        created = 0
         if new_transactions:
-            logger.info(f"Creating {len(new_transactions)} new transactions")
-            result = self.lunchmoney.create_transactions(new_transactions)
-            logger.info(f"Successfully created transactions: {result}")
+            logger.info("Creating %d new transactions", len(new_transactions))
+            result = self.lunchmoney.create_transactions_batched(new_transactions)
+            created = len(result.get('ids', []))
+            if result.get('error'):
+                logger.error("Lunch Money rejected transactions for account %s: %s", account_id, result['error'])
+            logger.info("Created %d of %d new transactions", created, len(new_transactions))
         else:
             logger.info("No new transactions to create")
 
-        return len(new_transactions), skipped
+        return created, skipped
 
     def sync_multiple_accounts(
         self,
         account_ids: List[str],
-        days_back: int = 31
+        days_back: int = 31,
+        max_workers: int = 8
     ) -> Dict[str, Tuple[int, int]]:
         """
-        Sync transactions for multiple Questrade accounts.
+        Sync transactions for multiple Questrade accounts concurrently.
 
         Args:
             account_ids: List of Questrade account IDs
             days_back: Number of days to look back
+            max_workers: Maximum number of accounts to sync in parallel
 
         Returns:
             Dictionary mapping account_id to (new_count, skipped_count)
         """
-        results = {}
+        if not account_ids:
+            return {}
 
-        for account_id in account_ids:
+        def sync_one(account_id: str) -> Tuple[int, int]:
             try:
-                new_count, skipped_count = self.sync_account(account_id, days_back)
-                results[account_id] = (new_count, skipped_count)
+                return self.sync_account(account_id, days_back)
             except Exception as e:
-                logger.error(f"Error syncing account {account_id}: {str(e)}")
-                results[account_id] = (0, 0)
+                logger.error("Error syncing account %s: %s", account_id, e)
+                return 0, 0
 
-        return results
+        # Each account's sync is network-bound, so overlap them on a thread pool
+        with ThreadPoolExecutor(max_workers=min(len(account_ids), max_workers)) as executor:
+            return dict(zip(account_ids, executor.map(sync_one, account_ids)))
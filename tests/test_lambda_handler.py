@@ -0,0 +1,219 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+from botocore.exceptions import ConnectTimeoutError, ReadTimeoutError
+
+from src import lambda_handler
+from src.questrade import QuestradeClient
+from src.lunchmoney import LunchMoneyClient
+
+
+def _account_config(account_id):
+    return {
+        'questrade_account_id': account_id,
+        'questrade_refresh_token': f'token-{account_id}',
+        'lunchmoney_asset_name': f'Asset {account_id}'
+    }
+
+
+def _rate_limited_error():
+    response = requests.Response()
+    response.status_code = 429
+    return requests.HTTPError(response=response)
+
+
+class TestLambdaHandler(unittest.TestCase):
+    """Test cases for the Lambda handler."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.lunchmoney_client = Mock(spec=LunchMoneyClient)
+        self.assets = {f'asset {i}': {'id': i, 'name': f'Asset {i}'} for i in range(5)}
+        self.lunchmoney_client.get_asset_by_name.side_effect = lambda name: self.assets.get(name.lower())
+
+        patchers = [
+            patch.object(lambda_handler, 'LUNCHMONEY_API_TOKEN', 'lm-token'),
+            patch.object(lambda_handler, '_lunchmoney_client', self.lunchmoney_client),
+            patch.object(lambda_handler, 'QuestradeClient', side_effect=self._make_questrade_client),
+            patch.object(lambda_handler, 'save_account_configs'),
+            patch.object(lambda_handler.time, 'sleep'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.save_account_configs = lambda_handler.save_account_configs
+
+    def _make_questrade_client(self, refresh_token, session=None):
+        """Build a Questrade client mock that rotates its refresh token."""
+        client = Mock(spec=QuestradeClient)
+        client.get_account_balances.return_value = {'totalEquity': 1000.0}
+        client.get_current_refresh_token.return_value = f'{refresh_token}-rotated'
+        return client
+
+    def test_handler_syncs_all_accounts(self):
+        """Test that every account is synced and rotated tokens are saved in config order."""
+        configs = [_account_config(str(i)) for i in range(5)]
+
+        with patch.object(lambda_handler, 'get_account_configs', return_value=configs):
+            result = lambda_handler.handler({}, None)
+
+        self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(result['body']['totals']['accounts_updated'], 5)
+        self.assertEqual(result['body']['tokens_rotated'], 5)
+
+        saved = self.save_account_configs.call_args[0][0]
+        self.assertEqual([cfg['questrade_account_id'] for cfg in saved], ['0', '1', '2', '3', '4'])
+        self.assertEqual(saved[0]['questrade_refresh_token'], 'token-0-rotated')
+        self.lunchmoney_client.refresh_assets.assert_called_once()
+
+    def test_handler_fetches_configs_once(self):
+        """Test that the config parameter is read once per invocation, however many accounts run."""
+        configs = [_account_config(str(i)) for i in range(5)]
+        ssm_client = Mock()
+        ssm_client.get_parameter.return_value = {
+            'Parameter': {'Value': json.dumps({'accounts': configs}), 'Version': 1}
+        }
+
+        with patch.multiple(lambda_handler, _ssm_client=ssm_client, _cached_configs=None,
+                            _cached_configs_version=None), \
+                patch.dict(lambda_handler._parameter_cache, clear=True):
+            lambda_handler.handler({}, None)
+
+        ssm_client.get_parameter.assert_called_once()
+
+    def test_handler_skips_invalid_configs(self):
+        """Test that incomplete configs are filtered out before any API work."""
+        configs = [_account_config('1'), {'questrade_account_id': '2'}]
+
+        with patch.object(lambda_handler, 'get_account_configs', return_value=configs):
+            result = lambda_handler.handler({}, None)
+
+        self.assertEqual(list(result['body']['results']), ['1'])
+        self.assertEqual(result['body']['accounts_processed'], 2)
+        lambda_handler.QuestradeClient.assert_called_once()
+
+    def test_handler_retries_rate_limited_calls(self):
+        """Test that HTTP 429 responses are retried with backoff."""
+        self.lunchmoney_client.update_asset_balance.side_effect = [_rate_limited_error(), {}]
+
+        with patch.object(lambda_handler, 'get_account_configs', return_value=[_account_config('1')]):
+            result = lambda_handler.handler({}, None)
+
+        self.assertEqual(result['body']['totals']['accounts_updated'], 1)
+        self.assertEqual(self.lunchmoney_client.update_asset_balance.call_count, 2)
+        lambda_handler.time.sleep.assert_called_once_with(lambda_handler.RETRY_BACKOFF_SECONDS)
+
+    def test_handler_skips_missing_asset(self):
+        """Test that an account whose asset is missing is reported as failed."""
+        self.assets = {'other asset': {'id': 9, 'name': 'Other Asset'}}
+
+        with patch.object(lambda_handler, 'get_account_configs', return_value=[_account_config('1')]):
+            result = lambda_handler.handler({}, None)
+
+        self.assertEqual(result['body']['results']['1'], {'balance': 0, 'updated': False})
+        self.assertEqual(result['body']['totals']['accounts_failed'], 1)
+        # Questrade was still queried, so its rotated token must be persisted
+        self.save_account_configs.assert_called_once()
+
+
+class TestAccountConfigs(unittest.TestCase):
+    """Test cases for loading and saving account configurations."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        lambda_handler._parameter_cache.clear()
+        self.addCleanup(lambda_handler._parameter_cache.clear)
+        for attr in ('_cached_configs', '_cached_configs_version'):
+            patcher = patch.object(lambda_handler, attr, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch.object(lambda_handler, '_ssm_client')
+        self.ssm_client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ssm_client.get_parameter.return_value = {
+            'Parameter': {'Value': '{"accounts": [{"questrade_account_id": "1"}]}', 'Version': 3}
+        }
+        self.ssm_client.put_parameter.return_value = {'Version': 4}
+
+    def test_get_account_configs_cached_across_invocations(self):
+        """Test that warm invocations reuse the cached parameter value."""
+        first = lambda_handler.get_account_configs()
+        second = lambda_handler.get_account_configs()
+
+        self.assertEqual(first, [{'questrade_account_id': '1'}])
+        self.assertEqual(second, first)
+        self.ssm_client.get_parameter.assert_called_once()
+
+    def test_get_account_configs_reuses_parsed_version(self):
+        """Test that an unchanged parameter version is not parsed again after the TTL expires."""
+        with patch.object(lambda_handler, 'CONFIG_CACHE_TTL', 0), \
+                patch.object(lambda_handler.orjson, 'loads', wraps=lambda_handler.orjson.loads) as json_loads:
+            first = lambda_handler.get_account_configs()
+            second = lambda_handler.get_account_configs()
+
+        self.assertIs(second, first)
+        self.assertEqual(self.ssm_client.get_parameter.call_count, 2)
+        json_loads.assert_called_once()
+
+    def test_save_account_configs_refreshes_cache(self):
+        """Test that the next load sees the saved configs rather than a stale read."""
+        lambda_handler.get_account_configs()
+        lambda_handler.save_account_configs([{'questrade_account_id': '2'}])
+        configs = lambda_handler.get_account_configs()
+
+        self.assertEqual(configs, [{'questrade_account_id': '2'}])
+        self.ssm_client.get_parameter.assert_called_once()
+
+    def test_save_account_configs_logs_configs_on_timeout(self):
+        """Test that a timed-out write falls back to logging the configs instead of raising."""
+        self.ssm_client.put_parameter.side_effect = ReadTimeoutError(endpoint_url='https://ssm')
+
+        with self.assertLogs(lambda_handler.logger, 'WARNING') as logs:
+            lambda_handler.save_account_configs([{'questrade_account_id': '2'}])
+
+        self.assertIn('Manual update required', '\n'.join(logs.output))
+
+    def test_get_account_configs_timeout_raises_value_error(self):
+        """Test that a timed-out read surfaces as the handler's configuration error."""
+        self.ssm_client.get_parameter.side_effect = ConnectTimeoutError(endpoint_url='https://ssm')
+
+        with self.assertRaises(ValueError):
+            lambda_handler.get_account_configs()
+
+    def test_env_account_configs_skip_ssm(self):
+        """Test that configs supplied via QUESTRADE_ACCOUNT_CONFIGS never touch SSM."""
+        accounts = [{'questrade_account_id': '7'}]
+
+        with patch.object(lambda_handler, '_env_account_configs', accounts):
+            configs = lambda_handler.get_account_configs()
+            lambda_handler.save_account_configs([{'questrade_account_id': '8'}])
+
+        self.assertEqual(configs, accounts)
+        self.ssm_client.get_parameter.assert_not_called()
+        self.ssm_client.put_parameter.assert_not_called()
+
+    def test_env_account_configs_must_be_an_object(self):
+        """Test that QUESTRADE_ACCOUNT_CONFIGS holding valid JSON that is not an object falls back to SSM."""
+        with patch.object(lambda_handler, 'ACCOUNT_CONFIGS_JSON', '[]'), \
+                self.assertLogs(lambda_handler.logger, 'WARNING'):
+            self.assertIsNone(lambda_handler._load_env_account_configs())
+
+    def test_get_account_configs_from_extension(self):
+        """Test reading the parameter through the Parameters and Secrets Lambda Extension."""
+        response = Mock()
+        response.read.return_value = b'{"Parameter": {"Value": "{\\"accounts\\": []}"}}'
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=False)
+
+        with patch.object(lambda_handler, 'USE_PARAMETERS_EXTENSION', True), \
+                patch.object(lambda_handler.urllib.request, 'urlopen', return_value=response) as urlopen:
+            configs = lambda_handler.get_account_configs()
+
+        self.assertEqual(configs, [])
+        self.ssm_client.get_parameter.assert_not_called()
+        request = urlopen.call_args[0][0]
+        self.assertIn('name=%2Fquestrade-lunchmoney%2Faccount-configs', request.full_url)
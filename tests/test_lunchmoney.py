@@ -0,0 +1,67 @@
+import json
+import unittest
+from unittest.mock import Mock
+
+from src.lunchmoney import LunchMoneyClient
+
+
+class TestLunchMoneyClient(unittest.TestCase):
+    """Test cases for LunchMoneyClient."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.session = Mock()
+        self.session.request.return_value.status_code = 200
+        self.session.request.return_value.content = (
+            b'{"assets": [{"id": 1, "name": "TFSA"}, {"id": 2, "name": "RRSP"}]}'
+        )
+        self.client = LunchMoneyClient('token', session=self.session)
+
+    def test_get_asset_by_name_caches_assets(self):
+        """Test that repeated lookups are case-insensitive and share one assets request."""
+        self.assertEqual(self.client.get_asset_by_name('tfsa')['id'], 1)
+        self.assertEqual(self.client.get_asset_by_name('RRSP')['id'], 2)
+        self.assertIsNone(self.client.get_asset_by_name('Margin'))
+
+        self.session.request.assert_called_once()
+
+    def test_refresh_assets(self):
+        """Test that refresh_assets picks up assets created after the first lookup."""
+        self.assertIsNone(self.client.get_asset_by_name('Margin'))
+        self.session.request.return_value.content = b'{"assets": [{"id": 3, "name": "Margin"}]}'
+
+        self.client.refresh_assets()
+
+        self.assertEqual(self.client.get_asset_by_name('margin')['id'], 3)
+        self.assertEqual(self.session.request.call_count, 2)
+
+    def test_make_request_encodes_json_body(self):
+        """Test that request payloads are sent as encoded JSON bytes."""
+        self.session.request.return_value.content = b'{}'
+
+        self.client.update_asset_balance(1, 100.5)
+
+        kwargs = self.session.request.call_args.kwargs
+        self.assertEqual(json.loads(kwargs['data']), {'balance': '100.5', 'currency': 'cad'})
+        self.assertEqual(kwargs['headers']['Content-Type'], 'application/json')
+
+    def test_create_transactions_batched(self):
+        """Test that transactions are split into batches and the created IDs merged in order."""
+        transactions = [{'payee': str(i)} for i in range(5)]
+        self.session.request.side_effect = lambda method, url, headers, data, params: Mock(
+            status_code=200,
+            content=json.dumps({'ids': [t['payee'] for t in json.loads(data)['transactions']]}).encode()
+        )
+
+        result = self.client.create_transactions_batched(transactions, batch_size=2)
+
+        self.assertEqual(result, {'ids': ['0', '1', '2', '3', '4']})
+        self.assertEqual(self.session.request.call_count, 3)
+
+    def test_create_transactions_batched_collects_errors(self):
+        """Test that per-batch errors are kept in the merged result rather than dropped."""
+        self.session.request.return_value.content = b'{"error": ["Invalid date"]}'
+
+        result = self.client.create_transactions_batched([{'payee': str(i)} for i in range(3)], batch_size=2)
+
+        self.assertEqual(result, {'ids': [], 'error': ['Invalid date', 'Invalid date']})
@@ -0,0 +1,111 @@
+import json
+import unittest
+from unittest.mock import Mock
+from datetime import datetime, timedelta
+import time
+
+import requests
+
+from src import questrade
+from src.questrade import QuestradeClient
+
+
+def _response(payload, status_code=200):
+    """Build a fake HTTP response carrying a JSON body."""
+    response = Mock(status_code=status_code, content=json.dumps(payload).encode())
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
+
+
+class TestQuestradeClient(unittest.TestCase):
+    """Test cases for QuestradeClient."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        questrade._token_cache.clear()
+        self.addCleanup(questrade._token_cache.clear)
+        self.session = Mock()
+        self.session.post.return_value = _response({
+            'access_token': 'access',
+            'api_server': 'https://api01.iq.questrade.com/',
+            'refresh_token': 'rotated',
+            'expires_in': 1800
+        })
+        self.client = QuestradeClient('refresh', session=self.session)
+
+    def test_get_account_activities_splits_into_31_day_windows(self):
+        """Test that long ranges are fetched per window and merged in date order."""
+        def get(url, headers, params):
+            return _response({'activities': [params['startTime']]})
+
+        self.session.get.side_effect = get
+        start_date = datetime(2024, 1, 1)
+
+        activities = self.client.get_account_activities('123', start_date, start_date + timedelta(days=100))
+
+        self.assertEqual(activities, [
+            '2024-01-01T00:00:00+00:00',
+            '2024-02-01T00:00:00+00:00',
+            '2024-03-03T00:00:00+00:00',
+            '2024-04-03T00:00:00+00:00',
+        ])
+        # All windows share a single OAuth refresh
+        self.session.post.assert_called_once()
+        self.assertEqual(self.client.get_current_refresh_token(), 'rotated')
+
+    def test_access_token_reused_by_client_with_rotated_token(self):
+        """Test that a client built from the rotated refresh token skips the OAuth exchange."""
+        self.session.get.return_value = _response({'accounts': []})
+        self.client.get_accounts()
+
+        client = QuestradeClient('rotated', session=self.session)
+        client.get_accounts()
+
+        self.session.post.assert_called_once()
+        self.assertEqual(client.get_current_refresh_token(), 'rotated')
+        self.assertEqual(self.session.get.call_args.kwargs['headers'], {'Authorization': 'Bearer access'})
+
+    def test_expiring_cached_token_is_refreshed(self):
+        """Test that a cached access token about to expire is not reused."""
+        questrade._token_cache['refresh'] = ('stale', 'https://api01.iq.questrade.com', time.time())
+        self.session.get.return_value = _response({'accounts': []})
+
+        QuestradeClient('refresh', session=self.session).get_accounts()
+
+        self.session.post.assert_called_once()
+
+    def test_rejected_cached_token_is_dropped_and_refreshed(self):
+        """Test that a cached access token rejected with 401 is evicted and the request retried once."""
+        questrade._token_cache['refresh'] = ('revoked', 'https://api01.iq.questrade.com', time.time() + 1800)
+        self.session.get.side_effect = [_response({'code': 1017}, status_code=401), _response({'accounts': []})]
+
+        accounts = QuestradeClient('refresh', session=self.session).get_accounts()
+
+        self.assertEqual(accounts, [])
+        self.session.post.assert_called_once()
+        self.assertEqual(self.session.get.call_args.kwargs['headers'], {'Authorization': 'Bearer access'})
+        self.assertNotIn('refresh', questrade._token_cache)
+        self.assertEqual(questrade._token_cache['rotated'][0], 'access')
+
+    def test_refresh_drops_spent_refresh_token(self):
+        """Test that only the newest refresh token keeps a cache entry."""
+        self.session.get.return_value = _response({'accounts': []})
+        self.client.get_accounts()
+        self.session.post.return_value = _response({
+            'access_token': 'access2',
+            'api_server': 'https://api01.iq.questrade.com/',
+            'refresh_token': 'rotated2',
+            'expires_in': 1800
+        })
+
+        self.client._refresh_access_token()
+
+        self.assertEqual(list(questrade._token_cache), ['rotated2'])
+
+    def test_make_request_raises_on_error_status(self):
+        """Test that HTTP error responses raise instead of being decoded."""
+        self.session.get.return_value = _response({'code': 1017}, status_code=401)
+
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_accounts()
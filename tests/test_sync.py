@@ -1,54 +1,67 @@
+import re
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
-import sys
-import os
-
-# Add parent directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import threading
 
 from src.sync import TransactionSync
 from src.questrade import QuestradeClient
 from src.lunchmoney import LunchMoneyClient
 
 
-class TestTransactionSync(unittest.TestCase):
-    """Test cases for TransactionSync."""
-
-    def setUp(self):
-        """Set up test fixtures."""
-        self.questrade_client = Mock(spec=QuestradeClient)
-        self.lunchmoney_client = Mock(spec=LunchMoneyClient)
-        self.sync = TransactionSync(
-            questrade_client=self.questrade_client,
-            lunchmoney_client=self.lunchmoney_client,
-            asset_id=123
-        )
-
-    def test_map_activity_to_transaction_basic(self):
-        """Test mapping a basic Questrade activity to Lunch Money transaction."""
-        activity = {
+# Shared read-only fixtures, built once at import
+_ACT_TRANSACTION_1 = MappingProxyType({
+    'transactionDate': '2024-01-15',
+    'netAmount': 100.00,
+    'description': 'Transaction 1',
+    'type': 'Dividends'
+})
+_ACT_TRANSACTION_2 = MappingProxyType({
+    'transactionDate': '2024-01-16',
+    'netAmount': 200.00,
+    'description': 'Transaction 2',
+    'type': 'Dividends'
+})
+
+# Lunch Money's copy of _ACT_TRANSACTION_1
+_EXISTING_TRANSACTION_1 = MappingProxyType({
+    'date': '2024-01-15',
+    'amount': '100.00',
+    'payee': 'Transaction 1'
+})
+
+# Unrelated Lunch Money history to bury duplicates in
+_LARGE_HISTORY = tuple(
+    MappingProxyType({'date': '2024-01-01', 'amount': str(i), 'payee': f'Other {i}'})
+    for i in range(10000)
+)
+
+# (activity, expected transaction fields, compiled expected notes pattern)
+MAP_ACTIVITY_CASES = (
+    (
+        # Basic dividend
+        MappingProxyType({
             'transactionDate': '2024-01-15',
             'netAmount': 100.50,
             'description': 'Dividend Payment',
             'type': 'Dividends',
             'symbol': 'AAPL'
-        }
-
-        transaction = self.sync._map_activity_to_transaction(activity, '12345678')
-
-        self.assertEqual(transaction['date'], '2024-01-15')
-        self.assertEqual(transaction['amount'], 100.50)
-        self.assertEqual(transaction['payee'], 'Dividend Payment')
-        self.assertEqual(transaction['currency'], 'cad')
-        self.assertEqual(transaction['status'], 'cleared')
-        self.assertEqual(transaction['asset_id'], 123)
-        self.assertIn('Type: Dividends', transaction['notes'])
-        self.assertIn('Symbol: AAPL', transaction['notes'])
-
-    def test_map_activity_to_transaction_trade(self):
-        """Test mapping a trade activity with quantity and price."""
-        activity = {
+        }),
+        {
+            'date': '2024-01-15',
+            'amount': 100.50,
+            'payee': 'Dividend Payment',
+            'currency': 'cad',
+            'status': 'cleared',
+            'asset_id': 123
+        },
+        re.compile(r'Type: Dividends\b.*\bSymbol: AAPL\b')
+    ),
+    (
+        # Trade with quantity, price and commission
+        MappingProxyType({
             'tradeDate': '2024-01-15',
             'netAmount': -1050.00,
             'description': 'Bought TSLA',
@@ -57,14 +70,48 @@ class TestTransactionSync(unittest.TestCase):
             'quantity': 10,
             'price': 105.00,
             'commission': 5.00
-        }
+        }),
+        {
+            'amount': -1050.00
+        },
+        re.compile(r'Quantity: 10 \| Price: \$105\.0 \| Commission: \$5\.0$')
+    ),
+)
+
 
-        transaction = self.sync._map_activity_to_transaction(activity, '12345678')
+class TestTransactionSync(unittest.TestCase):
+    """Test cases for TransactionSync."""
 
-        self.assertEqual(transaction['amount'], -1050.00)
-        self.assertIn('Quantity: 10', transaction['notes'])
-        self.assertIn('Price: $105.0', transaction['notes'])
-        self.assertIn('Commission: $5.0', transaction['notes'])
+    @classmethod
+    def setUpClass(cls):
+        """Build the client mocks once; spec introspection dominates their cost."""
+        cls.questrade_client = Mock(spec=QuestradeClient)
+        cls.lunchmoney_client = Mock(spec=LunchMoneyClient)
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.questrade_client.reset_mock(return_value=True, side_effect=True)
+        self.lunchmoney_client.reset_mock(return_value=True, side_effect=True)
+        self.sync = TransactionSync(
+            questrade_client=self.questrade_client,
+            lunchmoney_client=self.lunchmoney_client,
+            asset_id=123
+        )
+
+    def _stub_clients(self, activities=(), existing=(), ids=()):
+        """Set the activities Questrade returns, Lunch Money's existing transactions and the created IDs."""
+        self.questrade_client.get_account_activities.return_value = list(activities)
+        self.lunchmoney_client.get_transactions.return_value = list(existing)
+        self.lunchmoney_client.create_transactions_batched.return_value = {'ids': list(ids)}
+
+    def test_map_activity_to_transaction(self):
+        """Test mapping Questrade activities to Lunch Money transactions."""
+        for activity, expected, notes_pattern in MAP_ACTIVITY_CASES:
+            with self.subTest(activity_type=activity['type']):
+                transaction = self.sync._map_activity_to_transaction(activity, '12345678')
+
+                self.assertEqual({field: transaction[field] for field in expected}, expected)
+                self.assertRegex(transaction['notes'], notes_pattern)
 
     def test_generate_transaction_key(self):
         """Test transaction key generation for duplicate detection."""
@@ -75,90 +122,162 @@ class TestTransactionSync(unittest.TestCase):
         }
 
         key = self.sync._generate_transaction_key(transaction)
-        expected_key = '2024-01-15|100.5|Test Transaction'
+        expected_key = ('2024-01-15', 100.5, 'Test Transaction')
 
         self.assertEqual(key, expected_key)
 
+    def test_activity_key_matches_mapped_transaction_key(self):
+        """Test that activity keys match the keys of their mapped transactions."""
+        activities = [
+            {'tradeDate': '2024-01-15', 'netAmount': -1500, 'description': 'BUY AAPL', 'type': 'Trades'},
+            {'transactionDate': '2024-01-16', 'type': 'Dividends'}
+        ]
+
+        for activity in activities:
+            transaction = self.sync._map_activity_to_transaction(activity, '12345678')
+            self.assertEqual(
+                self.sync._activity_key(activity),
+                self.sync._generate_transaction_key(transaction)
+            )
+
     def test_sync_account_no_activities(self):
         """Test syncing when no activities are found."""
-        self.questrade_client.get_account_activities.return_value = []
+        self._stub_clients()
+        # Hold the background Lunch Money lookup open; sync_account must not wait for it
+        release = threading.Event()
+        lookup_finished = threading.Event()
+        self.addCleanup(release.set)
+
+        def get_transactions(**kwargs):
+            release.wait(5)
+            lookup_finished.set()
+            return []
+
+        self.lunchmoney_client.get_transactions.side_effect = get_transactions
 
         new_count, skipped_count = self.sync.sync_account('12345678', days_back=7)
 
         self.assertEqual(new_count, 0)
         self.assertEqual(skipped_count, 0)
         self.questrade_client.get_account_activities.assert_called_once()
+        self.assertFalse(lookup_finished.is_set())
 
     def test_sync_account_with_new_transactions(self):
         """Test syncing with new transactions."""
-        activities = [
-            {
-                'transactionDate': '2024-01-15',
-                'netAmount': 100.00,
-                'description': 'Transaction 1',
-                'type': 'Dividends'
-            },
-            {
-                'transactionDate': '2024-01-16',
-                'netAmount': 200.00,
-                'description': 'Transaction 2',
-                'type': 'Dividends'
-            }
-        ]
-
-        self.questrade_client.get_account_activities.return_value = activities
-        self.lunchmoney_client.get_transactions.return_value = []
-        self.lunchmoney_client.create_transactions.return_value = {'ids': [1, 2]}
+        self._stub_clients(activities=[_ACT_TRANSACTION_1, _ACT_TRANSACTION_2], ids=[1, 2])
 
         new_count, skipped_count = self.sync.sync_account('12345678', days_back=7)
 
         self.assertEqual(new_count, 2)
         self.assertEqual(skipped_count, 0)
-        self.lunchmoney_client.create_transactions.assert_called_once()
+        self.lunchmoney_client.create_transactions_batched.assert_called_once()
+        transactions = self.lunchmoney_client.create_transactions_batched.call_args[0][0]
+        self.assertEqual([t['payee'] for t in transactions], ['Transaction 1', 'Transaction 2'])
+
+    def test_sync_account_hands_all_new_transactions_over_at_once(self):
+        """Test that many new transactions are handed to the client in one call, not one per transaction."""
+        self._stub_clients(activities=(
+            {'transactionDate': '2024-01-15', 'netAmount': i, 'description': f'T{i}', 'type': 'Trades'}
+            for i in range(250)
+        ), ids=range(250))
+
+        new_count, _ = self.sync.sync_account('12345678', days_back=7)
+
+        self.assertEqual(new_count, 250)
+        # Splitting into request-sized batches is the client's job
+        self.lunchmoney_client.create_transactions_batched.assert_called_once()
+        self.assertEqual(len(self.lunchmoney_client.create_transactions_batched.call_args[0][0]), 250)
+        self.lunchmoney_client.create_transaction.assert_not_called()
+
+    def test_sync_account_reports_rejected_transactions(self):
+        """Test that transactions Lunch Money rejects are logged and not counted as created."""
+        self._stub_clients(activities=[_ACT_TRANSACTION_1, _ACT_TRANSACTION_2])
+        self.lunchmoney_client.create_transactions_batched.return_value = {
+            'ids': [1], 'error': ['Invalid date']
+        }
+
+        with self.assertLogs('src.sync', 'ERROR') as logs:
+            new_count, skipped_count = self.sync.sync_account('12345678', days_back=7)
+
+        self.assertEqual((new_count, skipped_count), (1, 0))
+        self.assertIn('Invalid date', logs.output[0])
 
     def test_sync_account_with_duplicates(self):
         """Test syncing with duplicate detection."""
-        activities = [
-            {
-                'transactionDate': '2024-01-15',
-                'netAmount': 100.00,
-                'description': 'Transaction 1',
-                'type': 'Dividends'
-            }
-        ]
+        # Mock existing transaction in Lunch Money, buried in a large history
+        existing_transactions = [*_LARGE_HISTORY, _EXISTING_TRANSACTION_1]
 
-        # Mock existing transaction in Lunch Money
-        existing_transactions = [
-            {
-                'date': '2024-01-15',
-                'amount': '100.00',
-                'payee': 'Transaction 1'
-            }
-        ]
+        self.questrade_client.get_account_activities.return_value = [_ACT_TRANSACTION_1]
+        self.lunchmoney_client.get_transactions.side_effect = [existing_transactions, []]
 
-        self.questrade_client.get_account_activities.return_value = activities
-        self.lunchmoney_client.get_transactions.return_value = existing_transactions
+        key_indexes = []
+        get_existing_transaction_keys = self.sync._get_existing_transaction_keys
 
-        new_count, skipped_count = self.sync.sync_account('12345678', days_back=7)
+        def capture_key_index(*args, **kwargs):
+            key_index = get_existing_transaction_keys(*args, **kwargs)
+            key_indexes.append(key_index)
+            return key_index
+
+        with patch.object(self.sync, '_get_existing_transaction_keys', side_effect=capture_key_index):
+            new_count, skipped_count = self.sync.sync_account('12345678', days_back=7)
 
         self.assertEqual(new_count, 0)
         self.assertEqual(skipped_count, 1)
-        self.lunchmoney_client.create_transactions.assert_not_called()
+        self.lunchmoney_client.create_transactions_batched.assert_not_called()
+        # The history is indexed into a set once per sync, not scanned per activity
+        self.assertEqual(len(key_indexes), 1)
+        self.assertIsInstance(key_indexes[0], (set, frozenset))
 
-    def test_sync_multiple_accounts(self):
-        """Test syncing multiple accounts."""
+    def test_sync_account_dedup_scales_linearly(self):
+        """Test that each activity is checked against the history in O(1), not by scanning it."""
+        comparisons = 0
+
+        class CountingDate(str):
+            """Activity date that counts how often dedup compares it with another key's date."""
+            __hash__ = str.__hash__
+
+            def __eq__(self, other):
+                nonlocal comparisons
+                comparisons += 1
+                return str.__eq__(self, other)
+
+        existing_transactions = [
+            {'date': f'2024-01-{i % 28 + 1:02d}', 'amount': str(i), 'payee': f'T{i}'}
+            for i in range(2000)
+        ]
         activities = [
-            {
-                'transactionDate': '2024-01-15',
-                'netAmount': 100.00,
-                'description': 'Transaction',
-                'type': 'Dividends'
-            }
+            {'transactionDate': CountingDate(f'2024-01-{i % 28 + 1:02d}'), 'netAmount': i,
+             'description': f'T{i}', 'type': 'Trades'}
+            for i in range(1000, 3000)
         ]
+        self._stub_clients(activities=activities, ids=range(1000))
+        self.lunchmoney_client.get_transactions.side_effect = [existing_transactions, []]
 
-        self.questrade_client.get_account_activities.return_value = activities
-        self.lunchmoney_client.get_transactions.return_value = []
-        self.lunchmoney_client.create_transactions.return_value = {'ids': [1]}
+        new_count, skipped_count = self.sync.sync_account('12345678', days_back=7)
+
+        self.assertEqual((new_count, skipped_count), (1000, 1000))
+        # A hashed lookup compares only on hash matches (about one per duplicate);
+        # scanning the history would compare each activity with all 2,000 existing keys
+        self.assertLess(comparisons, 2 * len(activities))
+
+    def test_get_existing_transaction_keys_pages_through_history(self):
+        """Test that existing transactions are fetched page by page until a short page."""
+        self.sync.TRANSACTION_PAGE_SIZE = 2
+        self.lunchmoney_client.get_transactions.side_effect = [
+            [{'date': '2024-01-15', 'amount': '1', 'payee': 'A'},
+             {'date': '2024-01-15', 'amount': '2', 'payee': 'B'}],
+            [{'date': '2024-01-16', 'amount': '3', 'payee': 'C'}]
+        ]
+
+        keys = self.sync._get_existing_transaction_keys(datetime(2024, 1, 1), datetime(2024, 1, 31))
+
+        self.assertEqual(keys, {('2024-01-15', 1.0, 'A'), ('2024-01-15', 2.0, 'B'), ('2024-01-16', 3.0, 'C')})
+        offsets = [c.kwargs['offset'] for c in self.lunchmoney_client.get_transactions.call_args_list]
+        self.assertEqual(offsets, [0, 2])
+
+    def test_sync_multiple_accounts(self):
+        """Test syncing multiple accounts."""
+        self._stub_clients(activities=[_ACT_TRANSACTION_1], ids=[1])
 
         results = self.sync.sync_multiple_accounts(['123', '456'], days_back=7)
 
@@ -166,6 +285,41 @@ class TestTransactionSync(unittest.TestCase):
         self.assertEqual(results['123'], (1, 0))
         self.assertEqual(results['456'], (1, 0))
 
+    def test_sync_multiple_accounts_runs_concurrently(self):
+        """Test that accounts are synced in parallel rather than one after another."""
+        account_ids = ['1', '2', '3', '4']
+        # Every account's Questrade call blocks until all four are in flight, so a
+        # serial implementation breaks the barrier and reports (0, 0) for each account
+        barrier = threading.Barrier(len(account_ids), timeout=5)
+
+        def get_activities(account_id, start_date, end_date):
+            barrier.wait()
+            return [_ACT_TRANSACTION_1]
+
+        self._stub_clients(ids=[1])
+        self.questrade_client.get_account_activities.side_effect = get_activities
+
+        with patch('src.sync.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as pool:
+            results = self.sync.sync_multiple_accounts(account_ids, days_back=7)
+
+        self.assertEqual(results, dict.fromkeys(account_ids, (1, 0)))
+        pool.assert_any_call(max_workers=len(account_ids))
+
+    def test_sync_multiple_accounts_isolates_failures(self):
+        """Test that one failing account does not affect the others."""
+        def get_activities(account_id, start_date, end_date):
+            if account_id == 'bad':
+                raise RuntimeError('API error')
+            return [{
+                'transactionDate': '2024-01-15',
+                'netAmount': 100.00,
+                'description': f'Transaction {account_id}',
+                'type': 'Dividends'
+            }]
+
+        self._stub_clients(ids=[1])
+        self.questrade_client.get_account_activities.side_effect = get_activities
+
+        results = self.sync.sync_multiple_accounts(['123', 'bad', '456'], days_back=7)
 
-if __name__ == '__main__':
-    unittest.main()
+        self.assertEqual(results, {'123': (1, 0), 'bad': (0, 0), '456': (1, 0)})